@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""
+Elite Dangerous Joystick Helper - Configuration file loading and saving
+"""
+
+import ast
+import configparser
+import io
+import os
+import re
+import types
+import logging
+
+
+_LOG = logging.getLogger("main")
+
+# Plain integer values, parsed without going through the AST
+_INT_RE = re.compile(r"-?\d+")
+
+# Parsed INI files: absolute path -> (st_mtime_ns, st_size, parsed config)
+_CFG_CACHE = {}
+
+
+def _new_parser():
+    """Return a parser without the INI features the config files don't use"""
+    # No interpolation and no multi-line values; the default delimiters and
+    # comment prefixes stay so hand-edited files keep loading
+    return configparser.RawConfigParser(
+        interpolation=None,
+        empty_lines_in_values=False,
+    )
+
+
+def load_config_from_ini(file_path):
+    """Load configuration from an INI file, reusing the last parse if unchanged"""
+    # Stat once; a missing file raises FileNotFoundError for the caller
+    st = os.stat(file_path)
+    cache_key = os.path.abspath(file_path)
+    cached = _CFG_CACHE.get(cache_key)
+    if cached is None or cached[:2] != (st.st_mtime_ns, st.st_size):
+        cached = (st.st_mtime_ns, st.st_size, _parse_ini(file_path))
+        _CFG_CACHE[cache_key] = cached
+
+    # Sequences are tuples, so copying each section is enough to keep
+    # callers from modifying the cached parse; function references aren't
+    # cached and get re-attached below
+    parsed_config = {
+        section: dict(settings) for section, settings in cached[2].items()
+    }
+
+    # Add function references if defined in DEFAULT_CONFIG
+    for section, overlay in _FUNC_OVERLAYS.items():
+        if section in parsed_config:
+            parsed_config[section].update(overlay)
+
+    return parsed_config
+
+
+def _parse_value(value):
+    """Convert an INI value to a Python literal, keeping it a string otherwise"""
+    stripped = value.strip()
+    # Plain integers are common enough to skip the AST entirely
+    if _INT_RE.fullmatch(stripped):
+        return int(stripped)
+    try:
+        return ast.literal_eval(stripped)
+    except (ValueError, SyntaxError):
+        return value
+
+
+def _parse_sequence(value):
+    """Convert an INI sequence to an immutable tuple of (key, presses) pairs"""
+    return tuple(
+        (item["key"], item["presses"]) for item in ast.literal_eval(value)
+    )
+
+
+# Value converters by key, anything else goes through _parse_value
+_HANDLERS = {
+    "sequence": _parse_sequence,
+    "delay": float,
+    "debounce": float,
+    "modifier": str,  # Button or key name, kept as is
+}
+
+
+def _parse_ini(file_path):
+    """Parse an INI configuration file into a configuration dictionary"""
+    config = _new_parser()
+    config.read(file_path)
+    parsed_config = {}
+    for section in config.sections():
+        settings = parsed_config[section] = {}
+        for key, value in config.items(section):
+            try:
+                settings[key] = _HANDLERS.get(key, _parse_value)(value)
+            except (ValueError, SyntaxError, KeyError, TypeError) as e:
+                if key != "sequence":
+                    raise
+                _LOG.error(f"Error parsing sequence in section {section}: {e}")
+                _LOG.error(f"Value was: {value}")
+                # Provide a default empty sequence
+                settings[key] = ()
+
+    return parsed_config
+
+
+def _serialize_config(config_dict):
+    """Render a configuration dictionary as INI text"""
+    config = _new_parser()
+
+    for button, settings in config_dict.items():
+        config[button] = {}
+        for key, value in settings.items():
+            if key in ("preRun", "afterRun"):
+                # Skip function references as they can't be serialized directly
+                continue
+            if key == "delay":
+                config[button][key] = str(value)
+            elif key == "sequence":
+                # Write (key, presses) pairs in the INI's list of dicts form
+                config[button][key] = str(
+                    [
+                        item if isinstance(item, dict)
+                        else {"key": item[0], "presses": item[1]}
+                        for item in value
+                    ]
+                )
+            else:
+                config[button][key] = str(value)
+
+    buf = io.StringIO()
+    config.write(buf)
+    return buf.getvalue()
+
+
+def create_default_config_file(file_path, config_dict):
+    """Create a default INI configuration file"""
+    # DEFAULT_CONFIG is read-only, so its INI text is rendered once at import
+    if config_dict is DEFAULT_CONFIG:
+        ini_text = _DEFAULT_INI_TEXT
+    else:
+        ini_text = _serialize_config(config_dict)
+
+    # Make sure the directory exists; a bare file name or the script
+    # directory needs no extra syscalls
+    config_dir = os.path.dirname(file_path)
+    if config_dir and not os.path.isdir(config_dir):
+        os.makedirs(config_dir, exist_ok=True)
+
+    # Exclusive create, so an existing file is never overwritten
+    with open(file_path, "x") as configfile:
+        configfile.write(ini_text)
+
+    _LOG.info(f"Default configuration file created at: {file_path}")
+    _LOG.info("You can edit this file to customize your joystick mappings.")
+
+
+def print_starting(caller):
+    """Example pre-run function"""
+    _LOG.info(f"Sequence for {caller} started")
+
+
+def print_end(caller):
+    """Example after-run function"""
+    _LOG.info(f"Sequence for {caller} ended")
+
+
+# Sequences are tuples of (key, presses) pairs; the mapping is read-only so
+# the fallback config can be shared with the helper without being modified
+DEFAULT_CONFIG = types.MappingProxyType({
+    "HAT_0_JOY0_up": {
+        # Combat 1SYS/1ENG/4WEP
+        "sequence": (
+            ("v", 1),  # Reset PIPS
+            ("x", 2),  # 4WEP
+        )
+    },
+    "HAT_0_JOY0_down": {
+        # Shields 4SYS/2ENG
+        "sequence": (
+            ("v", 1),
+            ("c", 2),  # 4SYS
+        )
+    },
+    "HAT_0_JOY0_left": {
+        # Persuit 2ENG/4WEP
+        "sequence": (
+            ("v", 1),
+            ("z", 1),
+            ("x", 1),
+        )
+    },
+    # Offense 3SYS/1ENG/3WEP
+    "HAT_0_JOY0_right": {
+        "sequence": (
+            ("v", 1),
+            ("c", 1),  # 3SYS
+            ("x", 1),  # 3WEP
+        )
+    },
+    "BUTTON_27": {
+        "sequence": (
+            ("n", 1),
+            ("WAIT", 1),
+            ("e", 2),
+            ("KEY_SPACE", 1),
+            ("d", 1),
+            ("KEY_SPACE", 1),
+            ("e", 2),
+            ("n", 1),
+        ),
+    },
+})
+
+_DEFAULT_INI_TEXT = _serialize_config(DEFAULT_CONFIG)
+
+# preRun/afterRun functions of DEFAULT_CONFIG, for sections that have any
+_FUNC_OVERLAYS = {
+    section: {
+        k: v for k, v in settings.items() if k in ("preRun", "afterRun")
+    }
+    for section, settings in DEFAULT_CONFIG.items()
+    if "preRun" in settings or "afterRun" in settings
+}
@@ -3,27 +3,141 @@
 Elite Dangerous Joystick Helper - Maps joystick button presses to keyboard sequences
 """
 
+import os
+import re
+import sys
+import glob
 import time
+import queue
+import select
+import struct
+import functools
 import threading
 import pygame
 import logging
 from pynput.keyboard import Key, Controller
+from config_io import load_config_from_ini
+
+# Longest time the event loop blocks waiting for input, in milliseconds
+_IDLE_WAIT_MS = 200
+
+# Default time in seconds during which repeats of the same button are dropped
+_DEFAULT_DEBOUNCE = 0.03
+
+# Longest time stopping waits for the sequence in progress, in seconds
+_WORKER_JOIN_S = 5.0
+
+# Event types the helper loop handles; SDL drops everything else
+# Device events reopen sticks that are unplugged and plugged back in
+_INTERESTING = [
+    pygame.JOYBUTTONDOWN,
+    pygame.JOYBUTTONUP,
+    pygame.JOYHATMOTION,
+    pygame.KEYDOWN,
+    pygame.KEYUP,
+    pygame.QUIT,
+    pygame.JOYDEVICEADDED,
+    pygame.JOYDEVICEREMOVED,
+]
+
+# Event types the joystick and keyboard monitors handle
+_JOYSTICK_MONITOR_EVENTS = [
+    pygame.JOYBUTTONDOWN,
+    pygame.JOYBUTTONUP,
+    pygame.JOYHATMOTION,
+    pygame.QUIT,
+    pygame.JOYDEVICEADDED,
+    pygame.JOYDEVICEREMOVED,
+]
+_KEYBOARD_MONITOR_EVENTS = [pygame.KEYDOWN, pygame.KEYUP, pygame.QUIT]
+
+# Linux joystick API (linux/joystick.h), used by the "linux_js" backend
+_JS_EVENT = struct.Struct("IhBB")  # time, value, type, number
+_JS_EVENT_BUTTON = 0x01
+_JS_EVENT_AXIS = 0x02
+_JS_EVENT_INIT = 0x80  # Synthetic event reporting the initial state
+_JSIOCGAXES = 0x80016A11
+_JSIOCGBUTTONS = 0x80016A12
+_JSIOCGNAME = 0x80806A13  # With a 128 byte buffer
+_JSIOCGAXMAP = 0x80406A32
+_ABS_HAT0X = 0x10
+_ABS_HAT3Y = 0x17
+
+# Joystick button names as used in config keys and modifiers
+_BUTTON_RE = re.compile(r"BUTTON_(\d+)_JOY(\d+)")
+
+# Hat (x, y) position to direction name used in config keys
+_HAT_DIR = {
+    (0, 0): "centered",
+    (0, 1): "up",
+    (1, 1): "up-right",
+    (1, 0): "right",
+    (1, -1): "down-right",
+    (0, -1): "down",
+    (-1, -1): "down-left",
+    (-1, 0): "left",
+    (-1, 1): "up-left",
+}
+
+
+def _sleep_until(deadline):
+    """Sleep until the given time.perf_counter() value"""
+    remaining = deadline - time.perf_counter()
+    if remaining > 0:
+        time.sleep(remaining)
+
+
+@functools.lru_cache(maxsize=256)
+def _key_name_for(key):
+    """Map a pygame key code to pygame's name for it"""
+    return pygame.key.name(key)
+
+
+@functools.lru_cache(maxsize=256)
+def _key_id_for(key):
+    """Map a pygame key code to the key name used in the configuration"""
+    key_name = _key_name_for(key)
+    return f"KEY_{key_name.upper()}" if len(key_name) > 1 else key_name
+
+
+@functools.lru_cache(maxsize=512)
+def _resolve_key(key_name):
+    """Map a key name string to a pynput key object"""
+    # Check if it's a special key
+    if key_name.startswith("KEY_"):
+        key_attr = key_name[4:].lower()
+        if hasattr(Key, key_attr):
+            return getattr(Key, key_attr)
+
+    # Otherwise, assume it's a character
+    return key_name
 
 
 class EDJoystickHelper:
-    def __init__(self, config):
+    def __init__(self, config, backend="pygame"):
         """
         Initialize the helper with a configuration dictionary
 
         Args:
             config: Dictionary mapping buttons to sequences of keypresses
+            backend: "pygame", or "linux_js" to read /dev/input/js* directly
+                (Linux only, falls back to pygame elsewhere)
         """
-        self.config = config
         self.keyboard = Controller()
-        self.running = False
-        self.pressed_buttons = set()
-        self.current_hat_positions = {}  # Track current hat positions
+        self._stop_evt = threading.Event()  # Set to leave the event loop
+        self.pressed_buttons = set()  # Pressed keys, by config key name
+        self._pressed_mask = []  # [joy_id] -> bitmask of pressed buttons
+        self._last_hat = {}  # (joy_id, hat_id) -> last (x, y) position
         self.config_file_path = None  # Store config file path for reloading
+        self._config_frozen = {}  # Compiled config, see _compile_config
+        self._known_keys = frozenset()  # Buttons, hats and keys worth handling
+        self._action_q = queue.Queue()  # Sequences waiting for the worker
+        self._last_fire = {}  # config key -> time.monotonic() of last trigger
+        self.joysticks = {}  # SDL instance id -> open pygame Joystick
+        self._joy_ids = {}  # SDL instance id -> joy_id used in config keys
+        self._vacant = {}  # joy_id of an unplugged stick -> its GUID
+        self._button_names = []  # [joy_id][button_id] -> "BUTTON_<b>_JOY<j>"
+        self._hat_names = []  # [joy_id][hat_id] -> "HAT_<h>_JOY<j>"
 
         # Set up logging
         self.logger = logging.getLogger("ED_Joystick_Helper")
@@ -37,132 +151,335 @@ class EDJoystickHelper:
             self.logger.addHandler(handler)
             self.logger.setLevel(logging.DEBUG)
 
-        # Initialize pygame for joystick support
-        pygame.init()
+        self._compile_config(config)
+
+        if backend == "linux_js" and not sys.platform.startswith("linux"):
+            self.logger.warning("The linux_js backend needs Linux, using pygame.")
+            backend = "pygame"
+        self.backend = backend
+        if backend == "linux_js":
+            self._open_linux_js()
+            return
+
+        # Initialize only the pygame subsystems needed for joystick support;
+        # the event queue lives in the display subsystem, no window is opened
+        pygame.display.init()
         pygame.joystick.init()
 
-        # Enable keyboard events explicitly
-        pygame.event.set_allowed([pygame.KEYDOWN, pygame.KEYUP])
+        # Only queue the events the main loop handles
+        pygame.event.set_blocked(None)
+        pygame.event.set_allowed(_INTERESTING)
 
         # Get the number of joysticks
         joystick_count = pygame.joystick.get_count()
+        self._has_input = joystick_count > 0
         if joystick_count == 0:
             self.logger.warning("No joysticks found!")
             return
 
         # Initialize all joysticks
-        self.joysticks = []
         for i in range(joystick_count):
-            joystick = pygame.joystick.Joystick(i)
-            joystick.init()
-            self.joysticks.append(joystick)
-            self.logger.info(f"Initialized {joystick.get_name()}")
-            # Initialize hat positions to centered
-            for hat_id in range(joystick.get_numhats()):
-                self.current_hat_positions[f"HAT_{hat_id}"] = "centered"
-
-    def _execute_sequence(self, button_name, button_config):
-        """Execute a sequence of keypresses for a button"""
-        self.logger.info(f"Executing sequence for {button_name}")
+            self._add_joystick(i)
 
-        # Call preRun function if defined
-        if "preRun" in button_config and callable(button_config["preRun"]):
-            button_config["preRun"](button_name)
+    def _add_joystick(self, index):
+        """Initialize a pygame joystick, giving a re-plugged stick its old number"""
+        joystick = pygame.joystick.Joystick(index)
+        joystick.init()
+        instance_id = joystick.get_instance_id()
+        if instance_id in self._joy_ids:
+            # SDL also reports the joysticks present at startup as added
+            return
+        guid = joystick.get_guid()
+        joy_id = next(
+            (j for j, vacant_guid in self._vacant.items() if vacant_guid == guid),
+            None,
+        )
+        if joy_id is None:
+            joy_id = len(self._button_names)
+        else:
+            del self._vacant[joy_id]
+        self.joysticks[instance_id] = joystick
+        self._joy_ids[instance_id] = joy_id
+        self._register_joystick(
+            joy_id,
+            joystick.get_name(),
+            joystick.get_numbuttons(),
+            joystick.get_numhats(),
+        )
+
+    def _remove_joystick(self, instance_id):
+        """Forget an unplugged pygame joystick, keeping its number free"""
+        joy_id = self._joy_ids.pop(instance_id, None)
+        if joy_id is None:
+            return
+        joystick = self.joysticks.pop(instance_id)
+        self._vacant[joy_id] = joystick.get_guid()
+        self.logger.info(f"Lost {joystick.get_name()}")
+        joystick.quit()
+        self._release_joystick_state(joy_id)
+
+    def _release_joystick_state(self, joy_id):
+        """Release the buttons and center the hats of a stick that is gone"""
+        # Otherwise a held modifier would stay latched for the other sticks
+        self._pressed_mask[joy_id] = 0
+        for hat_id in range(len(self._hat_names[joy_id])):
+            self._last_hat[(joy_id, hat_id)] = (0, 0)
+
+    def _register_joystick(self, index, name, num_buttons, num_hats):
+        """Precompute the names of a joystick's inputs and reset their state"""
+        # Rows are indexed by joystick number, which can have gaps
+        missing = index + 1 - len(self._pressed_mask)
+        if missing > 0:
+            self._pressed_mask.extend([0] * missing)
+            self._button_names.extend([] for _ in range(missing))
+            self._hat_names.extend([] for _ in range(missing))
+        self._pressed_mask[index] = 0
+        self._button_names[index] = [
+            f"BUTTON_{b}_JOY{index}" for b in range(num_buttons)
+        ]
+        self._hat_names[index] = [f"HAT_{h}_JOY{index}" for h in range(num_hats)]
+        self.logger.info(f"Initialized {name}")
+        # Initialize hat positions to centered
+        for hat_id in range(num_hats):
+            self._last_hat[(index, hat_id)] = (0, 0)
+
+    def _open_linux_js(self):
+        """Open every /dev/input/js* device for the linux_js backend"""
+        import fcntl  # Not available on Windows
+
+        self._js_fds = {}  # fd -> joy_id
+        self._js_hat_axes = {}  # joy_id -> {axis: (hat_id, is_x_axis)}
+        self._js_hat_xy = {}  # joy_id -> [hat_id] -> [x, y]
+        # jsN is always JOYN, even when other devices fail to open
+        devices = sorted(
+            (int(os.path.basename(path)[2:]), path)
+            for path in glob.glob("/dev/input/js[0-9]*")
+        )
+        for index, path in devices:
+            try:
+                fd = os.open(path, os.O_RDONLY | os.O_NONBLOCK)
+            except OSError as e:
+                self.logger.warning(f"Cannot open {path}: {e}")
+                continue
+
+            try:
+                count = bytearray(1)
+                fcntl.ioctl(fd, _JSIOCGBUTTONS, count)
+                num_buttons = count[0]
+                fcntl.ioctl(fd, _JSIOCGAXES, count)
+                num_axes = count[0]
+                axis_map = bytearray(0x40)
+                fcntl.ioctl(fd, _JSIOCGAXMAP, axis_map)
+                name = bytearray(128)
+                fcntl.ioctl(fd, _JSIOCGNAME, name)
+            except OSError as e:
+                self.logger.warning(f"Cannot query {path}: {e}")
+                os.close(fd)
+                continue
+            name = name.split(b"\0", 1)[0].decode(errors="replace")
+
+            # Hats show up as pairs of ABS_HAT*X/ABS_HAT*Y axes
+            hat_axes = {}
+            for axis in range(num_axes):
+                code = axis_map[axis]
+                if _ABS_HAT0X <= code <= _ABS_HAT3Y:
+                    hat_axes[axis] = ((code - _ABS_HAT0X) // 2, code % 2 == 0)
+            num_hats = max((hat for hat, _ in hat_axes.values()), default=-1) + 1
+
+            self._js_fds[fd] = index
+            self._js_hat_axes[index] = hat_axes
+            self._js_hat_xy[index] = [[0, 0] for _ in range(num_hats)]
+            self._register_joystick(index, name, num_buttons, num_hats)
+
+        self._has_input = bool(self._js_fds)
+        if not self._has_input:
+            self.logger.warning("No joysticks found!")
 
-        sequence = button_config["sequence"]
-        delay = button_config.get("delay", 0.1)
+    def _compile_config(self, config):
+        """
+        Compile a configuration into the lookup table for the event loop
+        and make it the current one
 
-        for item in sequence:
-            key = item["key"]
-            presses = item["presses"]
+        Each button name maps to a tuple of
+        (modifier, sequence, delay, preRun, afterRun, debounce) where the
+        modifier is None when not required, the sequence holds
+        (key object, presses) pairs and the functions are None when not
+        callable.
 
-            if key == "WAIT":
-                # Special case for wait command
-                time.sleep(presses)
+        A joystick button modifier is compiled to (joy_id, bit mask) and
+        checked against the pressed button masks. Any other modifier is
+        compiled to (None, name) and looked up in pressed_buttons.
+
+        Sections with malformed entries are logged and left out, so one bad
+        button can't keep the others from working.
+        """
+        frozen = {}
+        for button_name, button_config in config.items():
+            try:
+                modifier, sequence = self._compile_section(button_config)
+            except (TypeError, ValueError, KeyError, AttributeError) as e:
+                self.logger.error(f"Skipping {button_name}: {e}")
                 continue
+            pre_run = button_config.get("preRun")
+            after_run = button_config.get("afterRun")
+            frozen[button_name] = (
+                modifier,
+                sequence,
+                button_config.get("delay", 0.1),
+                pre_run if callable(pre_run) else None,
+                after_run if callable(after_run) else None,
+                button_config.get("debounce", _DEFAULT_DEBOUNCE),
+            )
+        self.config = config
+        self._config_frozen = frozen
+        # Name modifiers must be tracked even when they trigger nothing
+        self._known_keys = frozenset(frozen).union(
+            entry[0][1]
+            for entry in frozen.values()
+            if entry[0] is not None and entry[0][0] is None
+        )
+
+    @staticmethod
+    def _compile_section(button_config):
+        """Return the compiled (modifier, sequence) of a config section"""
+        modifier = button_config.get("modifier")
+        if modifier is not None:
+            if not isinstance(modifier, str):
+                raise TypeError(f"modifier must be a name, got {modifier!r}")
+            match = _BUTTON_RE.fullmatch(modifier)
+            if match:
+                modifier = (int(match[2]), 1 << int(match[1]))
+            else:
+                modifier = (None, modifier)
+        sequence = []
+        for item in button_config.get("sequence", ()):
+            # Steps are (key, presses) pairs or {"key": ..., "presses": ...}
+            if isinstance(item, dict):
+                item = (item["key"], item["presses"])
+            key_name, presses = item
+            if not isinstance(key_name, str):
+                raise TypeError(f"key must be a string, got {key_name!r}")
+            # WAIT takes seconds, every other key a number of presses
+            allowed = (int, float) if key_name == "WAIT" else int
+            if not isinstance(presses, allowed) or isinstance(presses, bool):
+                raise TypeError(f"bad presses {presses!r} for key {key_name!r}")
+            sequence.append((_resolve_key(key_name), presses))
+        return modifier, sequence
+
+    def _execute_sequence(self, button_name, entry, not_before=0.0):
+        """
+        Execute a sequence of keypresses for a compiled config entry
 
-            # Map key string to actual key
-            key_obj = self._map_key(key)
+        The first press waits until the time.perf_counter() value
+        not_before. Returns the deadline the next sequence should start at,
+        one delay after the last release.
+        """
+        self.logger.info("Executing sequence for %s", button_name)
+        sequence, delay, pre_run, after_run = entry[1:5]
+
+        # Call preRun function if defined
+        if pre_run is not None:
+            pre_run(button_name)
+
+        # Pace against absolute deadlines so sleep overshoot doesn't add up.
+        # The gap after a release is only waited for before the next press,
+        # so the sequence ends right after its last release and the gap is
+        # left to the caller.
+        deadline = max(not_before, time.perf_counter())
+        for key_obj, presses in sequence:
+            if key_obj == "WAIT":
+                # Special case for wait command
+                deadline += presses
+                _sleep_until(deadline)
+                continue
 
             # Press the key the specified number of times
             for _ in range(presses):
-                self.logger.debug(f"Pressing {key_obj} ({_ + 1}/{presses})")
+                _sleep_until(deadline)
+                self.logger.debug("Pressing %s (%d/%d)", key_obj, _ + 1, presses)
                 self.keyboard.press(key_obj)
-                time.sleep(delay)
-                self.keyboard.release(key_obj)
-                time.sleep(delay)
+                try:
+                    deadline += delay
+                    _sleep_until(deadline)
+                finally:
+                    # Never leave a key held down in the game
+                    self.keyboard.release(key_obj)
+                deadline += delay
 
         # Call afterRun function if defined
-        if "afterRun" in button_config and callable(button_config["afterRun"]):
-            button_config["afterRun"](button_name)
-
-    def _map_key(self, key_name):
-        """Map a key name string to a pynput key object"""
-        # Check if it's a special key
-        if key_name.startswith("KEY_"):
-            key_attr = key_name[4:].lower()
-            if hasattr(Key, key_attr):
-                return getattr(Key, key_attr)
-
-        # Otherwise, assume it's a character
-        return key_name
-
-    def _process_button_press(self, button_name, joy_id=None):
-        """Process a button press, checking modifiers and executing sequences. Supports multiple joysticks with same button name."""
-        # If joy_id is provided, use extended button name
-        config_key = button_name
-        if joy_id is not None:
-            config_key = f"{button_name}_JOY{joy_id}"
-        self.logger.debug(f"Button pressed: {config_key}")
-        if config_key in self.config:
-            button_config = self.config[config_key]
-
-            # Check if this button requires a modifier
-            if "modifier" in button_config:
-                modifier = button_config["modifier"]
-                if modifier not in self.pressed_buttons:
+        if after_run is not None:
+            after_run(button_name)
+
+        return deadline
+
+    def _process_button_press(self, config_key):
+        """Process a button press, checking modifiers and executing sequences"""
+        self.logger.debug("Button pressed: %s", config_key)
+        entry = self._config_frozen.get(config_key)
+        if entry is None:
+            return
+
+        # Check if this button requires a modifier
+        modifier = entry[0]
+        if modifier is not None:
+            mod_joy, mod_mask = modifier
+            if mod_joy is None:
+                if mod_mask not in self.pressed_buttons:
                     return
+            elif (
+                mod_joy >= len(self._pressed_mask)
+                or not self._pressed_mask[mod_joy] & mod_mask
+            ):
+                return
+
+        # Drop repeats (held buttons, bouncing hats) inside the debounce window
+        now = time.monotonic()
+        last_fire = self._last_fire.get(config_key)
+        if last_fire is not None and now - last_fire < entry[5]:
+            return
+        self._last_fire[config_key] = now
 
-            # Execute the sequence in a separate thread to not block the event loop
-            threading.Thread(
-                target=self._execute_sequence, args=(config_key, button_config)
-            ).start()
+        # Hand the sequence to the worker thread to not block the event loop
+        self._action_q.put((config_key, entry))
 
-    def _process_hat_event(self, hat_id, x_value, y_value, joy_id=None):
+    def _action_worker(self):
+        """Execute queued sequences one at a time until stopped"""
+        # Keeps the release-to-press gap between back-to-back sequences
+        next_start = 0.0
+        while True:
+            item = self._action_q.get()
+            if item is None:
+                break
+            try:
+                next_start = self._execute_sequence(*item, next_start)
+            except Exception as e:
+                self.logger.error(
+                    "Error executing sequence for %s: %s", item[0], e
+                )
+
+    def _process_hat_event(self, hat_id, x_value, y_value, joy_id):
         """Process a HAT event, converting it to a direction and triggering actions. Supports multiple joysticks."""
+        # Only process if the position has changed
+        key = (joy_id, hat_id)
+        position = (x_value, y_value)
+        if self._last_hat.get(key) == position:
+            return
+        self._last_hat[key] = position
+
         # Map hat position to direction
-        direction = "centered"
-        if x_value == 0 and y_value == 1:
-            direction = "up"
-        elif x_value == 1 and y_value == 1:
-            direction = "up-right"
-        elif x_value == 1 and y_value == 0:
-            direction = "right"
-        elif x_value == 1 and y_value == -1:
-            direction = "down-right"
-        elif x_value == 0 and y_value == -1:
-            direction = "down"
-        elif x_value == -1 and y_value == -1:
-            direction = "down-left"
-        elif x_value == -1 and y_value == 0:
-            direction = "left"
-        elif x_value == -1 and y_value == 1:
-            direction = "up-left"
-
-        hat_name = f"HAT_{hat_id}"
-        if joy_id is not None:
-            hat_name = f"{hat_name}_JOY{joy_id}"
-
-        # Only process if the direction has changed
-        if self.current_hat_positions.get(hat_name, None) != direction:
-            self.current_hat_positions[hat_name] = direction
-
-            # Create a hat event identifier that includes the direction
-            hat_event = f"{hat_name}_{direction}"
-
-            # Process the hat event if it's in the config
+        direction = _HAT_DIR.get(position, "centered")
+
+        # Create a hat event identifier that includes the direction
+        hat_event = f"{self._hat_names[joy_id][hat_id]}_{direction}"
+
+        # Process the hat event if it's in the config
+        if hat_event in self._known_keys:
             self._process_button_press(hat_event)
 
+    def set_stop_event(self, stop_evt):
+        """Share a stop event with the owner, setting it stops the helper"""
+        self._stop_evt = stop_evt
+
     def set_config_file_path(self, file_path):
         """Store the config file path for reloading"""
         self.config_file_path = file_path
@@ -174,11 +491,8 @@ class EDJoystickHelper:
             return False
 
         try:
-            # Import here to avoid circular imports
-            from main import load_config_from_ini
-
-            new_config = load_config_from_ini(self.config_file_path)
-            self.config = new_config
+            # Only replaces the current config once it compiled
+            self._compile_config(load_config_from_ini(self.config_file_path))
             self.logger.info(f"Configuration reloaded from {self.config_file_path}")
             return True
         except Exception as e:
@@ -187,60 +501,153 @@ class EDJoystickHelper:
 
     def start(self):
         """Start listening for joystick events"""
-        self.running = True
+        if not self._has_input:
+            # Nothing could ever produce an event, don't pump SDL for nothing
+            self.logger.warning("No joysticks to listen on, not starting.")
+            if self.backend == "pygame":
+                pygame.quit()
+            return
+
         self.logger.info("Starting Elite Dangerous Joystick Helper...")
+        worker = threading.Thread(target=self._action_worker, daemon=True)
+        worker.start()
 
         try:
-            # Main event loop
-            while self.running:
-                for event in pygame.event.get():
-                    # self.logger.debug(f"Event: {event}")
-                    if event.type == pygame.JOYBUTTONDOWN:
-                        button_name = f"BUTTON_{event.button}"
-                        joy_id = event.joy if hasattr(event, 'joy') else 0
-                        self.pressed_buttons.add(f"{button_name}_JOY{joy_id}")
-                        self._process_button_press(button_name, joy_id)
-                    elif event.type == pygame.JOYBUTTONUP:
-                        button_name = f"BUTTON_{event.button}"
-                        joy_id = event.joy if hasattr(event, 'joy') else 0
-                        pressed_name = f"{button_name}_JOY{joy_id}"
-                        if pressed_name in self.pressed_buttons:
-                            self.pressed_buttons.remove(pressed_name)
-                    elif event.type == pygame.JOYHATMOTION:
-                        hat_id = event.hat
-                        x_value, y_value = event.value
-                        joy_id = event.joy if hasattr(event, 'joy') else 0
-                        self._process_hat_event(hat_id, x_value, y_value, joy_id)
-                    elif event.type == pygame.KEYDOWN:
-                        key_name = pygame.key.name(event.key)
-                        key_id = (
-                            f"KEY_{key_name.upper()}" if len(key_name) > 1 else key_name
-                        )
-                        self.logger.info(f"Key pressed: {key_id}")
-                        # Process the key press as if it were a button
-                        self._process_button_press(key_id)
-                    elif event.type == pygame.KEYUP:
-                        key_name = pygame.key.name(event.key)
-                        key_id = (
-                            f"KEY_{key_name.upper()}" if len(key_name) > 1 else key_name
-                        )
-                        if key_id in self.pressed_buttons:
-                            self.pressed_buttons.remove(key_id)
-
-                time.sleep(0.01)  # Small sleep to prevent CPU spinning
+            if self.backend == "linux_js":
+                self._run_linux_js()
+            else:
+                self._run_pygame()
         except KeyboardInterrupt:
             self.logger.info("Stopping Elite Dangerous Joystick Helper...")
         finally:
-            pygame.quit()
+            # Drop what hasn't started yet, but let the sequence in progress
+            # finish so no key is left pressed
+            try:
+                while True:
+                    self._action_q.get_nowait()
+            except queue.Empty:
+                pass
+            self._action_q.put(None)
+            worker.join(timeout=_WORKER_JOIN_S)
+            if self.backend == "linux_js":
+                for fd in self._js_fds:
+                    os.close(fd)
+                self._js_fds.clear()
+            else:
+                pygame.quit()
+
+    def _run_pygame(self):
+        """Main event loop for the pygame backend"""
+        while not self._stop_evt.is_set():
+            # Block until an event arrives; the timeout only bounds how
+            # long it takes to notice stop()
+            event = pygame.event.wait(_IDLE_WAIT_MS)
+            if event.type == pygame.NOEVENT:
+                continue
+            for event in [event] + pygame.event.get(_INTERESTING):
+                # self.logger.debug(f"Event: {event}")
+                if event.type == pygame.JOYBUTTONDOWN:
+                    joy_id = self._joy_ids.get(event.instance_id)
+                    if joy_id is None:
+                        continue
+                    self._pressed_mask[joy_id] |= 1 << event.button
+                    button_name = self._button_names[joy_id][event.button]
+                    # Skip buttons that aren't mapped to anything
+                    if button_name not in self._known_keys:
+                        continue
+                    self._process_button_press(button_name)
+                elif event.type == pygame.JOYBUTTONUP:
+                    joy_id = self._joy_ids.get(event.instance_id)
+                    if joy_id is None:
+                        continue
+                    self._pressed_mask[joy_id] &= ~(1 << event.button)
+                elif event.type == pygame.JOYHATMOTION:
+                    hat_id = event.hat
+                    x_value, y_value = event.value
+                    joy_id = self._joy_ids.get(event.instance_id)
+                    if joy_id is None:
+                        continue
+                    self._process_hat_event(hat_id, x_value, y_value, joy_id)
+                elif event.type == pygame.KEYDOWN:
+                    key_id = _key_id_for(event.key)
+                    self.logger.info("Key pressed: %s", key_id)
+                    # Process the key press as if it were a button
+                    if key_id in self._known_keys:
+                        self.pressed_buttons.add(key_id)
+                        self._process_button_press(key_id)
+                elif event.type == pygame.KEYUP:
+                    key_id = _key_id_for(event.key)
+                    if key_id in self.pressed_buttons:
+                        self.pressed_buttons.remove(key_id)
+                elif event.type == pygame.JOYDEVICEADDED:
+                    self._add_joystick(event.device_index)
+                elif event.type == pygame.JOYDEVICEREMOVED:
+                    self._remove_joystick(event.instance_id)
+                elif event.type == pygame.QUIT:
+                    self._stop_evt.set()
+
+    def _run_linux_js(self):
+        """Main event loop for the linux_js backend"""
+        while not self._stop_evt.is_set() and self._js_fds:
+            ready, _, _ = select.select(
+                list(self._js_fds), [], [], _IDLE_WAIT_MS / 1000
+            )
+            for fd in ready:
+                joy_id = self._js_fds[fd]
+                try:
+                    data = os.read(fd, _JS_EVENT.size * 32)
+                except BlockingIOError:
+                    continue
+                except OSError as e:
+                    self.logger.warning(f"Lost joystick {joy_id}: {e}")
+                    del self._js_fds[fd]
+                    os.close(fd)
+                    self._release_joystick_state(joy_id)
+                    for position in self._js_hat_xy[joy_id]:
+                        position[:] = (0, 0)
+                    continue
+                for _, value, ev_type, number in _JS_EVENT.iter_unpack(data):
+                    self._process_js_event(joy_id, value, ev_type, number)
+        if not self._stop_evt.is_set():
+            self.logger.warning("All joysticks disconnected, stopping.")
+
+    def _process_js_event(self, joy_id, value, ev_type, number):
+        """Dispatch one js_event to the same handlers the pygame loop uses"""
+        initial = ev_type & _JS_EVENT_INIT
+        ev_type &= ~_JS_EVENT_INIT
+        if ev_type == _JS_EVENT_BUTTON:
+            if not value:
+                self._pressed_mask[joy_id] &= ~(1 << number)
+                return
+            self._pressed_mask[joy_id] |= 1 << number
+            button_name = self._button_names[joy_id][number]
+            # Initial state events only record buttons already held
+            if not initial and button_name in self._known_keys:
+                self._process_button_press(button_name)
+        elif ev_type == _JS_EVENT_AXIS:
+            hat = self._js_hat_axes[joy_id].get(number)
+            if hat is None:
+                return
+            hat_id, is_x_axis = hat
+            position = self._js_hat_xy[joy_id][hat_id]
+            # Hat axes report -32767, 0 or 32767 with Y growing downwards,
+            # flip Y to match the pygame hat values used in config keys
+            if is_x_axis:
+                position[0] = (value > 0) - (value < 0)
+            else:
+                position[1] = (value < 0) - (value > 0)
+            if initial:
+                self._last_hat[(joy_id, hat_id)] = tuple(position)
+            else:
+                self._process_hat_event(hat_id, position[0], position[1], joy_id)
 
     def stop(self):
         """Stop listening for joystick events"""
-        self.running = False
+        self._stop_evt.set()
 
 
-def print_joystick_events():
-    """Print information about connected joysticks and monitor joystick button presses"""
-    # Set up logging
+def _get_monitor_logger():
+    """Return the logger used by the event monitors, configuring it if needed"""
     logger = logging.getLogger("ED_Joystick_Helper")
     if not logger.handlers:
         logging.basicConfig(
@@ -248,14 +655,20 @@ def print_joystick_events():
             level=logging.INFO,
             format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
         )
+    return logger
+
 
-    pygame.init()
+def print_joystick_events():
+    """Print information about connected joysticks and monitor joystick button presses"""
+    logger = _get_monitor_logger()
+
+    # Skip audio, fonts and the rest of pygame.init()
+    pygame.display.init()
     pygame.joystick.init()
 
-    # Enable joystick events
-    pygame.event.set_allowed(
-        [pygame.JOYBUTTONDOWN, pygame.JOYBUTTONUP, pygame.JOYHATMOTION]
-    )
+    # Only queue joystick events, axis motion in particular is never used
+    pygame.event.set_blocked(None)
+    pygame.event.set_allowed(_JOYSTICK_MONITOR_EVENTS)
 
     # Get the number of joysticks
     joystick_count = pygame.joystick.get_count()
@@ -279,7 +692,12 @@ def print_joystick_events():
     try:
         # Main event loop
         while True:
-            for event in pygame.event.get():
+            # Block until an event arrives, then drain the burst without
+            # sleeping so back-to-back events aren't delayed
+            event = pygame.event.wait(_IDLE_WAIT_MS)
+            if event.type == pygame.NOEVENT:
+                continue
+            for event in [event] + pygame.event.get(_JOYSTICK_MONITOR_EVENTS):
                 # logger.debug(f"Event: {event}")  # Uncomment to see all events for debugging
                 if event.type == pygame.JOYBUTTONDOWN:
                     button_name = f"BUTTON_{event.button}"
@@ -289,33 +707,17 @@ def print_joystick_events():
                     hat_id = event.hat
                     x_value, y_value = event.value
                     joy_id = event.joy if hasattr(event, 'joy') else 0
-                    direction = "centered"
-
                     # Map hat position to direction
-                    if x_value == 0 and y_value == 1:
-                        direction = "up"
-                    elif x_value == 1 and y_value == 1:
-                        direction = "up-right"
-                    elif x_value == 1 and y_value == 0:
-                        direction = "right"
-                    elif x_value == 1 and y_value == -1:
-                        direction = "down-right"
-                    elif x_value == 0 and y_value == -1:
-                        direction = "down"
-                    elif x_value == -1 and y_value == -1:
-                        direction = "down-left"
-                    elif x_value == -1 and y_value == 0:
-                        direction = "left"
-                    elif x_value == -1 and y_value == 1:
-                        direction = "up-left"
+                    direction = _HAT_DIR.get((x_value, y_value), "centered")
 
                     hat_name = f"HAT_{hat_id}_JOY{joy_id}"
                     logger.info(
                         f"Hat moved: {hat_name}, "
                         f"Position: {direction} ({x_value}, {y_value})"
                     )
-
-            time.sleep(0.01)  # Small sleep to prevent CPU spinning
+                elif event.type == pygame.QUIT:
+                    logger.info("Exiting...")
+                    return
     except KeyboardInterrupt:
         logger.info("Exiting...")
     finally:
@@ -324,24 +726,21 @@ def print_joystick_events():
 
 def print_keyboard_events():
     """Monitor and print information about keyboard events for configuration"""
-    # Set up logging
-    logger = logging.getLogger("ED_Joystick_Helper")
-    if not logger.handlers:
-        logging.basicConfig(
-            filename="ed_joystick_helper.log",
-            level=logging.INFO,
-            format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-        )
+    logger = _get_monitor_logger()
 
-    pygame.init()
+    # Skip audio, fonts and the rest of pygame.init()
+    pygame.display.init()
     pygame.joystick.init()
 
     # Create a display window to capture keyboard events
     pygame.display.set_mode((300, 200))
     pygame.display.set_caption("Keyboard Event Monitor")
+    # Nothing is drawn afterwards, so the window only needs presenting once
+    pygame.display.flip()
 
-    # Enable keyboard events explicitly
-    pygame.event.set_allowed([pygame.KEYDOWN, pygame.KEYUP])
+    # Only queue keyboard events and the window close event
+    pygame.event.set_blocked(None)
+    pygame.event.set_allowed(_KEYBOARD_MONITOR_EVENTS)
 
     logger.info("Listening for key presses...")
     logger.info("Key names can be used in your configuration:")
@@ -351,39 +750,29 @@ def print_keyboard_events():
     try:
         # Main event loop
         while True:
-            for event in pygame.event.get():
-                if event.type == pygame.KEYDOWN:
-                    key_name = pygame.key.name(event.key)
-                    if key_name == " ":
-                        logger.info("Key pressed: 'SPACE' - Config as: KEY_SPACE")
-                    elif len(key_name) == 1:
-                        logger.info(
-                            f"Key pressed: '{key_name}' - Config as: {key_name}"
-                        )
-                    else:
-                        key_upper = key_name.upper()
-                        logger.info(
-                            f"Key pressed: '{key_name}' - "
-                            f"Config as: KEY_{key_upper}"
-                        )
-
-                    # Check if it's a special key that maps to pynput's Key enum
-                    from pynput.keyboard import Key
-
-                    key_attr = key_name.lower()
-                    if hasattr(Key, key_attr):
-                        pynput_key = f"KEY_{key_upper}"
-                        logger.info(
-                            f"  This is a special key - "
-                            f"Confirmed mapping: {pynput_key}"
-                        )
-                # Also handle window close event
-                elif event.type == pygame.QUIT:
-                    logger.info("Window closed, exiting...")
-                    return
+            # Block until an event arrives; the timeout keeps Ctrl+C responsive
+            event = pygame.event.wait(_IDLE_WAIT_MS)
+            if event.type == pygame.KEYDOWN:
+                key_name = _key_name_for(event.key)
+                key_id = _key_id_for(event.key)
+                if key_name == " ":
+                    logger.info("Key pressed: 'SPACE' - Config as: KEY_SPACE")
+                else:
+                    logger.info(
+                        f"Key pressed: '{key_name}' - Config as: {key_id}"
+                    )
 
-            pygame.display.flip()  # Update the display
-            time.sleep(0.01)  # Small sleep to prevent CPU spinning
+                # Check if it's a special key that maps to pynput's Key enum
+                key_attr = key_name.lower()
+                if hasattr(Key, key_attr):
+                    logger.info(
+                        f"  This is a special key - "
+                        f"Confirmed mapping: {key_id}"
+                    )
+            # Also handle window close event
+            elif event.type == pygame.QUIT:
+                logger.info("Window closed, exiting...")
+                return
     except KeyboardInterrupt:
         logger.info("Exiting...")
     finally:
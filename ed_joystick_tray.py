@@ -3,11 +3,13 @@
 Elite Dangerous Joystick Helper - System Tray Icon Implementation
 """
 
-import os
+import io
+import time
+import queue
+import base64
+import functools
 import threading
-import pystray
 import logging
-from PIL import Image, ImageDraw
 from ed_joystick_helper import EDJoystickHelper
 
 
@@ -25,38 +27,57 @@ def setup_logging():
     return logger
 
 
+# 64x64 PNG of the tray icon, a simple joystick-like drawing on black:
+# a light blue (0, 128, 255) base rectangle at (10, 40, 54, 54) and an
+# orange (255, 128, 0) joystick top ellipse at (20, 10, 44, 34)
+_ICON_PNG = (
+    b"iVBORw0KGgoAAAANSUhEUgAAAEAAAABACAIAAAAlC+aJAAAApklEQVR42u2YQQ7AIAgElZfz"
+    b"c/uBJqZlKSXOnBu6I0qMYwAAAEAdM6nu8rufeQeBtUup1ZhfRs/QsJL0L77PFXiXRuJgVelV"
+    b"DjaaY4XLL6lwdgdUkyRS5/gzgAACCHQWUN0oI3WO30LxJgQrcIhjSxhvoBWeQskMkG2hp2lk"
+    b"E0y+KRu/Smw1Mt6FAKA5uynk6xcxfXIXQgABBBBAAAEEEEAAAAAApFzyxCBL5iwrtwAAAABJ"
+    b"RU5ErkJggg=="
+)
+
+
+# Identical notifications posted within this many seconds are shown once
+_NOTIFY_DEDUP_S = 0.5
+
+
 # Create a simple icon for the system tray
+@functools.lru_cache(maxsize=1)
 def create_icon():
     """Create a simple icon for the system tray"""
-    width = 64
-    height = 64
-    color1 = (0, 128, 255)  # Light blue
-    color2 = (255, 128, 0)  # Orange
-    image = Image.new("RGB", (width, height), color=(0, 0, 0))
-    dc = ImageDraw.Draw(image)
-    # Draw a simple joystick-like icon
-    dc.rectangle((10, 40, 54, 54), fill=color1)  # Base
-    dc.ellipse((20, 10, 44, 34), fill=color2)  # Joystick top
+    # Imported here so non-tray modes never load Pillow
+    from PIL import Image
+
+    image = Image.open(io.BytesIO(base64.b64decode(_ICON_PNG)))
+    image.load()
     return image
 
 
 class EDJoystickTray:
     """Class to manage the system tray icon and application lifecycle"""
 
-    def __init__(self, config_path, config=None):
+    def __init__(self, config_path, config=None, backend="pygame"):
         self.config_path = config_path
         self.config = config
+        self.backend = backend
         self.helper = None
         self.helper_thread = None
         self.icon = None
-        self.icon_thread = None
+        self._stop_evt = threading.Event()  # Shared with the helper
+        self._notify_q = queue.Queue()  # Messages waiting for _notify_loop
         self.logger = setup_logging()
 
-    def start(self):
-        """Start the application with system tray icon"""
-        # Start the helper in a separate thread
-        self.helper = EDJoystickHelper(self.config)
+    def start_and_block(self):
+        """Run the application with system tray icon until it exits"""
+        # Imported here so non-tray modes never load the tray backend
+        import pystray
+
+        # The helper is the only worker thread; the icon takes the main one
+        self.helper = EDJoystickHelper(self.config, backend=self.backend)
         self.helper.set_config_file_path(self.config_path)
+        self.helper.set_stop_event(self._stop_evt)
 
         self.helper_thread = threading.Thread(target=self.helper.start, daemon=True)
         self.helper_thread.start()
@@ -73,61 +94,53 @@ class EDJoystickTray:
             ),
         )
 
+        threading.Thread(target=self._notify_loop, daemon=True).start()
+
         self.logger.info("ED Joystick Helper is running in the background.")
         self.logger.info("Right-click on the system tray icon for options.")
 
-        # Start the icon in a separate non-daemon thread
-        # Using non-daemon thread ensures the app stays alive even if main thread exits
-        self.icon_thread = threading.Thread(target=self.icon.run, daemon=False)
-        self.icon_thread.start()
-
-    def join(self):
-        """Wait for the icon thread to complete (optional method to block if needed)"""
-        if self.icon_thread and self.icon_thread.is_alive():
-            self.icon_thread.join()
-
-    def detach_to_background(self):
-        """Detach the application to run in the background without blocking the main thread"""
-        import time
-        import threading
-
-        self.logger.info("ED Joystick Helper detached to background")
-
-        # Create a background thread that will keep the application alive
-        # This thread is non-daemon, so it will keep the process running
-        # even after the main thread exits
-        def keep_alive():
-            self.logger.info("Background thread started")
-            # Sleep for a very short time to allow the main thread to exit
-            time.sleep(0.1)
-            # Now we're running in the background
-
-            # Loop until the icon thread is no longer alive
-            # This thread will exit when the icon thread exits
-            while self.icon_thread and self.icon_thread.is_alive():
-                time.sleep(1.0)
-
-        # Start the keep-alive thread as non-daemon
-        threading.Thread(target=keep_alive, daemon=False).start()
-        return True
+        # Blocks until exit_app stops the icon
+        try:
+            self.icon.run()
+        finally:
+            # Let the helper leave its loop and release the joysticks
+            self._stop_evt.set()
+            self._notify_q.put(None)
+            # Bounded by the helper, which gives its worker a few seconds
+            # to finish the sequence in progress
+            self.helper_thread.join()
+
+    def _notify_loop(self):
+        """Show queued notifications off the menu thread until stopped"""
+        last_message, last_time = None, 0.0
+        while True:
+            message = self._notify_q.get()
+            if message is None:
+                break
+            now = time.monotonic()
+            if message == last_message and now - last_time < _NOTIFY_DEDUP_S:
+                continue
+            last_message, last_time = message, now
+            try:
+                self.icon.notify(message, "ED Joystick Helper")
+            except Exception as e:
+                # Not every pystray backend supports notifications
+                self.logger.warning(f"Could not show notification: {e}")
 
     def reload_config(self, icon, item):
         """Reload configuration from file"""
         success = self.helper.reload_config()
         if success:
             self.logger.info("Configuration reloaded successfully")
-            icon.notify("Configuration reloaded successfully", "ED Joystick Helper")
+            self._notify_q.put("Configuration reloaded successfully")
         else:
             self.logger.error("Failed to reload configuration")
-            icon.notify("Failed to reload configuration", "ED Joystick Helper")
+            self._notify_q.put("Failed to reload configuration")
 
     def exit_app(self, icon, item):
         """Exit the application"""
         self.logger.info("Shutting down ED Joystick Helper")
+        self._stop_evt.set()
         icon.visible = False
-        self.helper.stop()
+        # Makes icon.run() return, start_and_block then joins the helper
         icon.stop()
-        # Give helper thread time to clean up
-        self.helper_thread.join(timeout=1.0)
-        # Force exit in case threads are hanging
-        os._exit(0)
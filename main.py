@@ -4,18 +4,25 @@ Elite Dangerous Joystick Helper - Main entry point
 """
 
 import argparse
-import configparser
 import os
 import sys
+import pickle
 import logging
+import tempfile
 import subprocess
-from PIL import Image, ImageDraw
+from config_io import (
+    DEFAULT_CONFIG,
+    create_default_config_file,
+    load_config_from_ini,
+)
 from ed_joystick_helper import (
     EDJoystickHelper,
     print_joystick_events,
     print_keyboard_events,
 )
-from ed_joystick_tray import EDJoystickTray
+
+
+_LOG = logging.getLogger("main")
 
 
 def setup_normal_logging():
@@ -25,140 +32,54 @@ def setup_normal_logging():
         format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
         datefmt="%Y-%m-%d %H:%M:%S",
     )
-    logger = logging.getLogger("main")
-    return logger
-
-
-def print_starting(caller):
-    """Example pre-run function"""
-    logger = logging.getLogger("main")
-    logger.info(f"Sequence for {caller} started")
-
-
-def print_end(caller):
-    """Example after-run function"""
-    logger = logging.getLogger("main")
-    logger.info(f"Sequence for {caller} ended")
-
-
-def load_config_from_ini(file_path):
-    """Load configuration from an INI file"""
-    logger = logging.getLogger("main")
-    config = configparser.ConfigParser()
-    if not os.path.exists(file_path):
-        logger.error(f"Configuration file {file_path} not found.")
-        sys.exit(1)
-
-    config.read(file_path)
-    parsed_config = {}
-    for section in config.sections():
-        parsed_config[section] = {}
-        for key, value in config.items(section):
-            if key == "sequence":
-                # Convert string to list of key-press objects
-                try:
-                    parsed_config[section][key] = eval(value)
-                except (SyntaxError, NameError) as e:
-                    logger.error(f"Error parsing sequence in section {section}: {e}")
-                    logger.error(f"Value was: {value}")
-                    # Provide a default empty sequence
-                    parsed_config[section][key] = []
-            elif key == "delay":
-                # Convert delay to float
-                parsed_config[section][key] = float(value)
-            elif key == "modifier":
-                # Store modifier as string
-                parsed_config[section][key] = value
-            else:
-                # Try to convert to appropriate type if possible
-                try:
-                    parsed_config[section][key] = eval(value)
-                except (SyntaxError, NameError):
-                    parsed_config[section][key] = value
-
-    # Add function references if defined in the default_config
-    for section in parsed_config:
-        if section in default_config:
-            for func_key in ["preRun", "afterRun"]:
-                if func_key in default_config[section]:
-                    parsed_config[section][func_key] = default_config[section][func_key]
-
-    return parsed_config
-
-
-def create_default_config_file(file_path, config_dict):
-    """Create a default INI configuration file"""
-    logger = logging.getLogger("main")
-    config = configparser.ConfigParser()
-
-    for button, settings in config_dict.items():
-        config[button] = {}
-        for key, value in settings.items():
-            if key in ("preRun", "afterRun"):
-                # Skip function references as they can't be serialized directly
-                continue
-            if key == "delay":
-                config[button][key] = str(value)
-            elif key == "sequence":
-                # Convert sequence dict to string representation
-                config[button][key] = str(value)
-            else:
-                config[button][key] = str(value)
-
-    # Make sure the directory exists
-    os.makedirs(os.path.dirname(file_path), exist_ok=True)
-
-    with open(file_path, "w") as configfile:
-        config.write(configfile)
-
-    logger.info(f"Default configuration file created at: {file_path}")
-    logger.info("You can edit this file to customize your joystick mappings.")
-
-
-default_config = {
-    "HAT_0_JOY0_up": {
-        # Combat 1SYS/1ENG/4WEP
-        "sequence": [
-            {"key": "v", "presses": 1},  # Reset PIPS
-            {"key": "x", "presses": 2},  # 4WEP
-        ]
-    },
-    "HAT_0_JOY0_down": {
-        # Shields 4SYS/2ENG
-        "sequence": [
-            {"key": "v", "presses": 1}, 
-            {"key": "c", "presses": 2}  # 4SYS
-        ]
-    },
-    "HAT_0_JOY0_left": {
-        # Persuit 2ENG/4WEP
-        "sequence": [
-            {"key": "v", "presses": 1}, 
-            {"key": "z", "presses": 1}, 
-            {"key": "x", "presses": 1}
-        ]
-    },
-    # Offense 3SYS/1ENG/3WEP
-    "HAT_0_JOY0_right": {
-        "sequence": [
-            {"key": "v", "presses": 1},
-            {"key": "c", "presses": 1},  # 3SYS
-            {"key": "x", "presses": 1},  # 3WEP
-        ]
-    },
-    "BUTTON_27": {
-        "sequence": [
-            {"key": "n", "presses": 1},
-            {"key": "WAIT", "presses": 1},
-            {"key": "e", "presses": 2},
-            {"key": "KEY_SPACE", "presses": 1},
-            {"key": "d", "presses": 1},
-            {"key": "KEY_SPACE", "presses": 1},
-            {"key": "e", "presses": 2},
-            {"key": "n", "presses": 1},
-        ],
-    },
-}
+    return _LOG
+
+
+# Environment variable pointing a relaunched --background child at the
+# parent's pickled configuration, so it doesn't parse the INI file again
+CONFIG_PICKLE_ENV = "ED_CFG_PICKLE"
+
+
+def free_own_console():
+    """
+    Detach from the console on Windows when no other process is using it
+
+    Returns False when the console is shared, e.g. with the cmd.exe that
+    started us, since that shell keeps waiting regardless
+    """
+    import ctypes
+
+    kernel32 = ctypes.windll.kernel32
+    pids = (ctypes.c_uint32 * 2)()
+    count = kernel32.GetConsoleProcessList(pids, len(pids))
+    if count > 1:
+        return False
+    if count == 1:
+        # Our own console window (e.g. started from Explorer), close it
+        kernel32.FreeConsole()
+    return True
+
+
+def detach_from_terminal():
+    """
+    Double fork into a new session with the standard streams on /dev/null
+
+    Returns True in the original process, which should exit, and False in
+    the detached one. Linux only: forking without exec after pynput has
+    loaded the macOS frameworks is not supported there.
+    """
+    if os.fork():
+        return True
+    os.setsid()
+    # Leave the session leader so the process can't reacquire a terminal
+    if os.fork():
+        os._exit(0)
+    devnull = os.open(os.devnull, os.O_RDWR)
+    for fd in (0, 1, 2):
+        os.dup2(devnull, fd)
+    if devnull > 2:
+        os.close(devnull)
+    return False
 
 
 def main():
@@ -203,6 +124,12 @@ def main():
         action="store_true",
         help="Run the application in console mode (not in background)",
     )
+    parser.add_argument(
+        "--backend",
+        choices=["pygame", "linux_js"],
+        default="pygame",
+        help="Joystick input backend; linux_js reads /dev/input/js* directly (Linux only)",
+    )
     parser.add_argument(
         "--background",
         action="store_true",
@@ -219,59 +146,87 @@ def main():
     else:
         config_file = args.config
 
-        # Create config file if requested or if it doesn't exist and create-config flag is set
-        if args.create_config and not os.path.exists(config_file):
-            create_default_config_file(config_file, default_config)
-            return
-
-        # Use INI config if it exists, otherwise fall back to default
-        if os.path.exists(config_file):
+        # Create config file if requested and it doesn't exist yet
+        if args.create_config:
+            try:
+                create_default_config_file(config_file, DEFAULT_CONFIG)
+                return
+            except FileExistsError:
+                pass
+
+        # Use the parent's config when relaunched by --background, otherwise
+        # the INI config if it exists, otherwise fall back to default
+        pickled_config = os.environ.pop(CONFIG_PICKLE_ENV, None)
+        if pickled_config:
+            with open(pickled_config, "rb") as f:
+                config = pickle.load(f)
+            os.remove(pickled_config)
+            logger.info(f"Using configuration handed over from: {config_file}")
+        else:
             try:
                 config = load_config_from_ini(config_file)
                 logger.info(f"Using configuration from: {config_file}")
+            except FileNotFoundError:
+                logger.warning(f"Configuration file not found: {config_file}")
+                logger.info("Using default configuration.")
+                config = DEFAULT_CONFIG
             except Exception as e:
                 logger.error(f"Error loading configuration: {e}")
                 logger.info("Falling back to default configuration.")
-                config = default_config
-        else:
-            logger.warning(f"Configuration file not found: {config_file}")
-            logger.info("Using default configuration.")
-            config = default_config
+                config = DEFAULT_CONFIG
 
         # Run with or without system tray based on command line argument
         if args.no_tray or args.console:
             # Original direct mode with console output
             logger.info("Running in console mode")
-            helper = EDJoystickHelper(config)
+            helper = EDJoystickHelper(config, backend=args.backend)
             helper.set_config_file_path(config_file)
             helper.start()
-        elif args.background:
-            # Relaunch the script in a detached process and exit parent
-            if os.name == 'nt':
-                DETACHED_PROCESS = 0x00000008
-                subprocess.Popen([
-                    sys.executable, os.path.abspath(__file__),
-                    *(arg for arg in sys.argv[1:] if arg != '--background')
-                ], creationflags=DETACHED_PROCESS, close_fds=True)
-                logger.info("Application detached to background. Exiting parent process.")
-                sys.exit(0)
-            else:
-                logger.error("--background is only implemented for Windows.")
-                sys.exit(1)
+        elif args.background and os.name == 'nt' and not free_own_console():
+            # The console belongs to a shell that waits for us, relaunch
+            # the script in a detached process and exit parent, handing
+            # over the already loaded config through a pickle
+            with tempfile.NamedTemporaryFile(
+                "wb", suffix=".pickle", delete=False
+            ) as f:
+                pickle.dump(dict(config), f)
+            env = dict(os.environ, **{CONFIG_PICKLE_ENV: f.name})
+            DETACHED_PROCESS = 0x00000008
+            # A frozen executable is the program itself, not an interpreter
+            script = [] if getattr(sys, "frozen", False) else [os.path.abspath(__file__)]
+            subprocess.Popen([
+                sys.executable, *script,
+                *(arg for arg in sys.argv[1:] if arg != '--background')
+            ], creationflags=DETACHED_PROCESS, close_fds=True, env=env)
+            logger.info("Application detached to background. Exiting parent process.")
+            sys.exit(0)
+        elif (
+            args.background
+            and os.name != 'nt'
+            and not sys.platform.startswith("linux")
+        ):
+            logger.error("--background is only implemented for Windows and Linux.")
+            sys.exit(1)
         else:
+            if args.background and os.name != 'nt':
+                # Fork so the child keeps everything imported and parsed so
+                # far, then leave the terminal and its output behind
+                if detach_from_terminal():
+                    logger.info("Application detached to background. Exiting parent process.")
+                    sys.exit(0)
+
             # System tray mode (default) - runs in background
+            # Imported here so the other modes don't load pystray and Pillow
+            from ed_joystick_tray import EDJoystickTray
+
             logger.info("Starting in background mode with system tray")
-            app = EDJoystickTray(config_file, config)
+            app = EDJoystickTray(config_file, config, backend=args.backend)
             try:
-                app.start()
-                logger.info("Application is running in the system tray")
-                # Block the main thread until the icon thread completes
-                # This keeps the application alive
-                app.join()
+                # Runs the tray icon on the main thread until exit
+                app.start_and_block()
             except KeyboardInterrupt:
+                # start_and_block has already stopped the helper
                 logger.info("Keyboard interrupt received, shutting down")
-                if app.icon and hasattr(app.icon, 'visible'):
-                    app.exit_app(app.icon, None)
 
 
 if __name__ == "__main__":